@@ -1,5 +1,26 @@
 import itertools
 import random
+from collections import defaultdict
+
+# Shared result for sentences that pin down no cells
+_EMPTY = frozenset()
+
+
+def neighbor_counts(height, width, mines):
+    """
+    Returns a height x width grid holding, for every cell,
+    the number of mines among its neighbors.
+    """
+    counts = [[0] * width for i in range(height)]
+
+    # Bump the window around each mine rather than scanning every cell
+    for i, j in mines:
+        for row in counts[max(i - 1, 0):i + 2]:
+            for k in range(max(j - 1, 0), min(j + 2, width)):
+                row[k] += 1
+        counts[i][j] -= 1
+
+    return counts
 
 
 class Minesweeper():
@@ -15,20 +36,16 @@ class Minesweeper():
         self.mines = set()
 
         # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
+        self.board = [[False] * self.width for i in range(self.height)]
 
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        # Add mines randomly, sampling distinct cells in one shot
+        for index in random.sample(range(height * width), mines):
+            i, j = divmod(index, width)
+            self.mines.add((i, j))
+            self.board[i][j] = True
+
+        # Mines never move, so count every cell's neighbors once up front
+        self._counts = neighbor_counts(self.height, self.width, self.mines)
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -59,23 +76,15 @@ class Minesweeper():
         not including the cell itself.
         """
 
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
+        i, j = cell
+        return self._counts[i][j]
 
-        return count
+    def nearby_mines_all(self):
+        """
+        Returns the number of nearby mines for every cell,
+        as a list of rows.
+        """
+        return [list(row) for row in self._counts]
 
     def won(self):
         """
@@ -84,45 +93,163 @@ class Minesweeper():
         return self.mines_found == self.mines
 
 
+def cell_bit(cell, width):
+    """
+    Returns the bit standing for a cell in a sentence's mask
+    on a board of the given width.
+    """
+    i, j = cell
+    return 1 << (i * width + j)
+
+
+def mask_cells(mask, width):
+    """
+    Returns the list of cells whose bits are set in mask
+    on a board of the given width.
+    """
+    cells = []
+    while mask:
+        bit = mask & -mask
+        cells.append(divmod(bit.bit_length() - 1, width))
+        mask ^= bit
+    return cells
+
+
+def nth_set_bit(mask, k):
+    """
+    Returns the position of the k-th lowest set bit in mask,
+    counting from 0.
+    """
+    low, high = 0, mask.bit_length() - 1
+
+    # Binary search for the shortest prefix of mask holding k + 1 set bits
+    while low < high:
+        mid = (low + high) // 2
+        if (mask & ((2 << mid) - 1)).bit_count() > k:
+            high = mid
+        else:
+            low = mid + 1
+    return low
+
+
 class Sentence():
     """
     Logical statement about a Minesweeper game
     A sentence consists of a set of board cells,
     and a count of the number of those cells which are mines.
+
+    The cells are stored as a bitmask over the board, one bit per cell,
+    so that subset tests and differences between sentences are
+    plain integer operations. Without a board width, the sentence
+    uses the narrowest width that fits its cells.
     """
 
-    def __init__(self, cells, count):
-        self.cells = set(cells)
+    def __init__(self, cells, count, width=None):
+        self._fit_width = width is None
+        self.width = width
+        self.cells = cells
         self.count = count
 
+    @classmethod
+    def from_mask(cls, mask, count, width):
+        """
+        Returns a sentence over the cells whose bits are set in mask.
+        """
+        sentence = cls((), count, width)
+        sentence.mask = mask
+        return sentence
+
+    def cell_bit(self, cell):
+        """
+        Returns the bit standing for a cell in this sentence's mask,
+        or 0 for a cell outside the sentence's width, which cannot be in it.
+        """
+        i, j = cell
+        if i < 0 or not 0 <= j < self.width:
+            return 0
+        return cell_bit(cell, self.width)
+
+    @property
+    def cells(self):
+        """
+        The board cells in the sentence, decoded from the mask.
+
+        This is a read-only snapshot: to change a sentence's cells,
+        assign a new collection to cells or use mark_mine and mark_safe.
+        """
+        return frozenset(mask_cells(self.mask, self.width))
+
+    @cells.setter
+    def cells(self, cells):
+        cells = frozenset(cells)
+        if self._fit_width:
+            self.width = max((j for i, j in cells), default=0) + 1
+
+        mask = 0
+        for cell in cells:
+            bit = self.cell_bit(cell)
+            if not bit:
+                raise ValueError(f"cell {cell} is outside a board of width {self.width}")
+            mask |= bit
+        self.mask = mask
+
+        # Cached results of known_mines, known_safes and hashing
+        self._known_mines = None
+        self._known_safes = None
+        self._hash = None
+
+    @property
+    def count(self):
+        """
+        The number of mines among the sentence's cells.
+        """
+        return self._count
+
+    @count.setter
+    def count(self, count):
+        self._count = count
+
+        # Known mines, known safes and the hash depend on the count
+        self._known_mines = None
+        self._known_safes = None
+        self._hash = None
+
     def __eq__(self, other):
-        return self.cells == other.cells and self.count == other.count
+        if self.width == other.width:
+            return self.mask == other.mask and self.count == other.count
+        return self.count == other.count and self.cells == other.cells
 
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
     def __hash__(self):
-        return hash(repr(self))
+        if self._hash is None:
+            self._hash = hash((self.cells, self.count))
+        return self._hash
 
     def known_mines(self):
         """
-        Returns the set of all cells in self.cells known to be mines.
+        Returns a frozenset of all cells in self.cells known to be mines.
         """
 
-        if self.count == len(self.cells):
-            return set(self.cells)
-        else:
-            return set()
+        if self._known_mines is None:
+            if self.count == self.mask.bit_count():
+                self._known_mines = self.cells
+            else:
+                self._known_mines = _EMPTY
+        return self._known_mines
 
     def known_safes(self):
         """
-        Returns the set of all cells in self.cells known to be safe.
+        Returns a frozenset of all cells in self.cells known to be safe.
         """
 
-        if self.count == 0:
-            return set(self.cells)
-        else:
-            return set()
+        if self._known_safes is None:
+            if self.count == 0:
+                self._known_safes = self.cells
+            else:
+                self._known_safes = _EMPTY
+        return self._known_safes
 
     def mark_mine(self, cell):
         """
@@ -130,15 +257,13 @@ class Sentence():
         a cell is known to be a mine.
         """
 
-        to_be_removed = set()
-
-        for eachCell in self.cells:
-            if (cell == eachCell):
-                to_be_removed.add(eachCell)
-                self.count -= 1;
-
-        for eachCell in to_be_removed:
-            self.cells.remove(eachCell)
+        bit = self.cell_bit(cell)
+        if self.mask & bit:
+            self.mask ^= bit
+            self.count -= 1
+            self._known_mines = None
+            self._known_safes = None
+            self._hash = None
 
     def mark_safe(self, cell):
         """
@@ -146,14 +271,12 @@ class Sentence():
         a cell is known to be safe.
         """
 
-        to_be_removed = set()
-
-        for eachCell in self.cells:
-            if (cell == eachCell):
-                to_be_removed.add(eachCell)
-
-        for eachCell in to_be_removed:
-            self.cells.remove(eachCell)
+        bit = self.cell_bit(cell)
+        if self.mask & bit:
+            self.mask ^= bit
+            self._known_mines = None
+            self._known_safes = None
+            self._hash = None
 
 class MinesweeperAI():
     """
@@ -166,6 +289,18 @@ class MinesweeperAI():
         self.height = height
         self.width = width
 
+        # In-bounds neighbors of every cell, computed once
+        self._neighbors = {
+            (i, j): frozenset(
+                (ii, jj)
+                for ii in range(max(0, i - 1), min(height, i + 2))
+                for jj in range(max(0, j - 1), min(width, j + 2))
+                if (ii, jj) != (i, j)
+            )
+            for i in range(height)
+            for j in range(width)
+        }
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -173,17 +308,33 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
+        # The same moves and mines as bitmasks over the board
+        self._moves_mask = 0
+        self._mines_mask = 0
+
         # List of sentences about the game known to be true
         self.knowledge = []
 
+        # Sentences in knowledge that mention each cell
+        self._cell_to_sentences = defaultdict(list)
+
+        # The sentence in knowledge holding each cell mask, to avoid duplicates
+        self._mask_to_sentence = {}
+
+        # Pairs of sentence cell masks already compared for subset inference
+        self._pairs_seen = set()
+
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
+        self._mines_mask |= cell_bit(cell, self.width)
+        for sentence in self._cell_to_sentences.pop(cell, ()):
+            del self._mask_to_sentence[sentence.mask]
             sentence.mark_mine(cell)
+            self._refile(sentence)
 
     def mark_safe(self, cell):
         """
@@ -191,8 +342,39 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
+        for sentence in self._cell_to_sentences.pop(cell, ()):
+            del self._mask_to_sentence[sentence.mask]
             sentence.mark_safe(cell)
+            self._refile(sentence)
+
+    def add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base, unless it is empty
+        or a sentence about the same cells is already known.
+        Returns whether the sentence was added.
+        """
+        if not sentence.mask or sentence.mask in self._mask_to_sentence:
+            return False
+        self._mask_to_sentence[sentence.mask] = sentence
+        self.knowledge.append(sentence)
+        for cell in sentence.cells:
+            self._cell_to_sentences[cell].append(sentence)
+        return True
+
+    def _refile(self, sentence):
+        """
+        Files a sentence that has just been marked under its new mask.
+        If it is now empty, or another sentence already holds that mask,
+        it is dropped from the per-cell index instead, and the end of
+        add_knowledge drops it from knowledge.
+        """
+        if sentence.mask and sentence.mask not in self._mask_to_sentence:
+            self._mask_to_sentence[sentence.mask] = sentence
+            return
+        # The survivor compares equal, so match by identity
+        for cell in sentence.cells:
+            owners = self._cell_to_sentences[cell]
+            owners[:] = [owner for owner in owners if owner is not sentence]
 
     def add_knowledge(self, cell, count):
         """
@@ -211,61 +393,92 @@ class MinesweeperAI():
         """
 
         self.moves_made.add(cell)
+        self._moves_mask |= cell_bit(cell, self.width)
+
+        # Sentences losing this cell may now pair up differently
+        pending = list(self._cell_to_sentences.get(cell, ()))
 
         self.mark_safe(cell)
 
-        sentence_set = set()
-
-        for i in [cell[0] - 1, cell[0], cell[0] + 1]:
-            for j in [cell[1] - 1, cell[1], cell[1] + 1]:
-                if 0 <= i and i <= self.height - 1 and 0 <= j and j <= self.width - 1 and (i != cell[0] or j != cell[1]):
-                    if (i, j) in set(self.mines):
-                        count -= 1
-                    elif (i, j) not in set(self.safes):
-                        sentence_set.add((i, j))
-
-        my_sentence = Sentence(sentence_set, count)
-
-        self.knowledge.append(my_sentence)
-
-        self.check(my_sentence)
-
-        new_sentences = set()
-
-        for sentence_1 in self.knowledge:
-            for sentence_2 in self.knowledge:
-                if sentence_1.cells != sentence_2.cells:
-                    if sentence_1.cells.issubset(sentence_2.cells):
-                        new_cells = set(sentence_2.cells)
-                        new_count = sentence_2.count
-                        for tuple in sentence_1.cells:
-                            new_cells.remove(tuple)
-                        new_count -= sentence_1.count
-                        new_sentences.add(Sentence(new_cells, new_count))
-                        self.check(sentence_1)
-                        self.check(sentence_2)
-                    elif sentence_2.cells.issubset(sentence_1.cells):
-                        new_cells = set(sentence_1.cells)
-                        new_count = sentence_1.count
-                        for tuple in sentence_2.cells:
-                            new_cells.remove(tuple)
-                        new_count -= sentence_2.count
-                        new_sentences.add(Sentence(new_cells, new_count))
-                        self.check(sentence_1)
-                        self.check(sentence_2)
-
-        for eachSentence in new_sentences:
-            self.knowledge.append(eachSentence)
-            self.check(eachSentence)
+        # Known mines come off the count, known cells out of the sentence
+        neighbors = self._neighbors[cell]
+        count -= len(neighbors & self.mines)
+        sentence_set = neighbors - self.mines - self.safes
+
+        my_sentence = Sentence(sentence_set, count, self.width)
+
+        if self.add_sentence(my_sentence):
+            pending.append(my_sentence)
+
+        # Only sentences that are new or just changed can give new inferences,
+        # so pair those against the knowledge base rather than every pair
+        while pending:
+            sentence_1 = pending.pop()
+
+            # Dropped duplicates say nothing their survivor does not
+            if self._mask_to_sentence.get(sentence_1.mask) is not sentence_1:
+                continue
+            pending.extend(self.check(sentence_1))
+
+            # Resolved sentences have already been marked into every
+            # other sentence, so pairing them adds nothing
+            if not 0 < sentence_1.count < sentence_1.mask.bit_count():
+                continue
+            mask_1 = sentence_1.mask
+            count_1 = sentence_1.count
 
+            new_sentences = {}
+
+            for sentence_2 in self._mask_to_sentence.values():
+                mask_2 = sentence_2.mask
+                count_2 = sentence_2.count
+                if not 0 < count_2 < mask_2.bit_count():
+                    continue
+                if mask_1 == mask_2:
+                    continue
+
+                pair = (mask_1, mask_2)
+                if pair in self._pairs_seen:
+                    continue
+                self._pairs_seen.add(pair)
+
+                if mask_1 & mask_2 == mask_1:
+                    new_sentences[mask_2 & ~mask_1] = count_2 - count_1
+                elif mask_1 & mask_2 == mask_2:
+                    new_sentences[mask_1 & ~mask_2] = count_1 - count_2
+
+            for new_mask, new_count in new_sentences.items():
+                sentence = Sentence.from_mask(new_mask, new_count, self.width)
+                if self.add_sentence(sentence):
+                    pending.append(sentence)
+
+        # Resolved sentences end up emptied by marking their cells,
+        # and duplicates lose their mask to the sentence already holding it
+        self.knowledge = list(self._mask_to_sentence.values())
+
+        # Forget pairs involving masks that no longer belong to any sentence
+        self._pairs_seen = {
+            pair for pair in self._pairs_seen
+            if pair[0] in self._mask_to_sentence
+            and pair[1] in self._mask_to_sentence
+        }
 
     def check(self, checking_set):
-        if bool(checking_set.known_mines()):
-            for element in checking_set.known_mines():
-                self.mines.add(element)
-        elif bool(checking_set.known_safes()):
-            for element in checking_set.known_safes():
-                self.safes.add(element)
+        """
+        Marks the cells a sentence pins down as mines or as safe,
+        and returns the sentences that changed as a result.
+        """
+        changed = []
+        known_mines = checking_set.known_mines()
+        if known_mines:
+            for cell in known_mines - self.mines:
+                changed.extend(self._cell_to_sentences.get(cell, ()))
+                self.mark_mine(cell)
+        else:
+            for cell in checking_set.known_safes() - self.safes:
+                changed.extend(self._cell_to_sentences.get(cell, ()))
+                self.mark_safe(cell)
+        return changed
 
     def make_safe_move(self):
         """
@@ -277,9 +490,10 @@ class MinesweeperAI():
         and self.moves_made, but should not modify any of those values.
         """
 
-        for tuple in self.safes:
-            if tuple not in set(self.moves_made):
-                return tuple
+        for cell in self.safes:
+            if cell not in self.moves_made:
+                return cell
+        return None
 
     def make_random_move(self):
         """
@@ -289,9 +503,11 @@ class MinesweeperAI():
             2) are not known to be mines
         """
 
-        for i in range(self.height):
-            for j in range(self.width):
-                tuple = (i, j)
-                if tuple not in set(self.moves_made):
-                    if tuple not in set(self.mines):
-                        return tuple
+        board = (1 << (self.height * self.width)) - 1
+        free = board & ~(self._moves_mask | self._mines_mask)
+        if not free:
+            return None
+
+        # Pick the k-th free cell by position, without decoding them all
+        k = random.randrange(free.bit_count())
+        return divmod(nth_set_bit(free, k), self.width)
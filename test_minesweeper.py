@@ -0,0 +1,197 @@
+import random
+import unittest
+
+from minesweeper import Minesweeper, MinesweeperAI, Sentence, neighbor_counts
+
+
+def brute_force_count(game, cell):
+    """
+    Counts the mines around a cell by checking its 3x3 window directly.
+    """
+    i, j = cell
+    return sum(
+        (ii, jj) in game.mines
+        for ii in range(i - 1, i + 2)
+        for jj in range(j - 1, j + 2)
+        if (ii, jj) != (i, j)
+    )
+
+
+class MinesweeperTest(unittest.TestCase):
+
+    def test_nearby_mines_matches_brute_force(self):
+        for seed in range(20):
+            random.seed(seed)
+            game = Minesweeper(7, 9, 15)
+            for i in range(7):
+                for j in range(9):
+                    self.assertEqual(
+                        game.nearby_mines((i, j)),
+                        brute_force_count(game, (i, j))
+                    )
+
+    def test_nearby_mines_all_matches_brute_force(self):
+        for seed in range(20):
+            random.seed(seed)
+            game = Minesweeper(7, 9, 15)
+            expected = [
+                [brute_force_count(game, (i, j)) for j in range(9)]
+                for i in range(7)
+            ]
+            self.assertEqual(game.nearby_mines_all(), expected)
+            self.assertEqual(neighbor_counts(7, 9, game.mines), expected)
+
+    def test_nearby_mines_all_returns_a_copy(self):
+        game = Minesweeper(3, 4, 2)
+        game.nearby_mines_all()[0][0] = 99
+        self.assertNotEqual(game.nearby_mines((0, 0)), 99)
+
+
+class SentenceTest(unittest.TestCase):
+
+    def test_known_mines_cannot_be_changed_by_callers(self):
+        sentence = Sentence({(0, 0), (0, 1)}, 2)
+        with self.assertRaises(AttributeError):
+            sentence.known_mines().add((7, 7))
+        self.assertEqual(sentence.known_mines(), {(0, 0), (0, 1)})
+
+    def test_known_safes_cannot_be_changed_by_callers(self):
+        sentence = Sentence({(0, 0), (0, 1)}, 0)
+        with self.assertRaises(AttributeError):
+            sentence.known_safes().add((7, 7))
+        self.assertEqual(sentence.known_safes(), {(0, 0), (0, 1)})
+
+    def test_setting_count_refreshes_known_cells(self):
+        sentence = Sentence({(0, 0), (0, 1)}, 2)
+        self.assertEqual(sentence.known_mines(), {(0, 0), (0, 1)})
+        sentence.count = 0
+        self.assertEqual(sentence.known_mines(), set())
+        self.assertEqual(sentence.known_safes(), {(0, 0), (0, 1)})
+
+    def test_setting_count_refreshes_the_hash(self):
+        sentence = Sentence({(0, 0)}, 1)
+        sentence.count = 0
+        self.assertEqual(hash(sentence), hash(Sentence({(0, 0)}, 0)))
+        self.assertIn(Sentence({(0, 0)}, 0), {sentence})
+        self.assertNotIn(Sentence({(0, 0)}, 1), {sentence})
+
+    def test_width_defaults_to_fit_the_cells(self):
+        sentence = Sentence({(0, 9)}, 1)
+        self.assertEqual(sentence.cells, {(0, 9)})
+        sentence.cells = {(2, 12)}
+        self.assertEqual(sentence.cells, {(2, 12)})
+
+    def test_cells_outside_a_given_width_are_rejected(self):
+        with self.assertRaises(ValueError):
+            Sentence({(0, 9)}, 1, width=8)
+
+    def test_marking_cells_outside_the_width_does_nothing(self):
+        sentence = Sentence({(0, 0)}, 1, width=5)
+        sentence.mark_safe((0, 5))
+        sentence.mark_mine((1, -1))
+        self.assertEqual(sentence, Sentence({(0, 0)}, 1, width=5))
+
+    def test_cells_is_a_read_only_snapshot(self):
+        sentence = Sentence({(0, 1)}, 1)
+        with self.assertRaises(AttributeError):
+            sentence.cells.add((0, 2))
+        sentence.cells = sentence.cells | {(0, 2)}
+        self.assertEqual(sentence.cells, {(0, 1), (0, 2)})
+
+    def test_equality_compares_cells_across_widths(self):
+        cells = {(0, 1), (1, 0), (1, 1)}
+        self.assertEqual(Sentence(cells, 1, width=5), Sentence(cells, 1))
+        self.assertEqual(hash(Sentence(cells, 1, width=5)), hash(Sentence(cells, 1)))
+        self.assertNotEqual(Sentence({(1, 0)}, 1, width=5), Sentence({(0, 5)}, 1, width=10))
+
+    def test_knowledge_holds_sentences_built_without_a_width(self):
+        ai = MinesweeperAI(4, 5)
+        ai.add_knowledge((0, 0), 1)
+        self.assertIn(Sentence({(0, 1), (1, 0), (1, 1)}, 1), ai.knowledge)
+
+
+class MinesweeperAITest(unittest.TestCase):
+
+    def test_marking_does_not_leave_duplicate_sentences(self):
+        ai = MinesweeperAI(8, 8)
+        ai.add_sentence(Sentence({(3, 3), (3, 4)}, 1, 8))
+        ai.add_sentence(Sentence({(3, 3), (3, 4), (3, 5)}, 1, 8))
+        ai.mark_safe((3, 5))
+        self.assertEqual(len(ai._cell_to_sentences[(3, 3)]), 1)
+        self.assertEqual(len(ai._cell_to_sentences[(3, 4)]), 1)
+        ai.mark_safe((3, 3))
+        self.assertEqual(len(ai._cell_to_sentences[(3, 4)]), 1)
+
+        # The end of add_knowledge sweeps the dropped copy out of knowledge
+        ai.add_knowledge((7, 7), 0)
+        self.assertEqual(ai.knowledge.count(Sentence({(3, 4)}, 1)), 1)
+
+    def test_pairs_of_resolved_sentences_are_forgotten(self):
+        ai = MinesweeperAI(8, 8)
+        ai.add_knowledge((0, 0), 1)
+        ai.add_knowledge((2, 0), 1)
+        ai.add_knowledge((2, 2), 0)
+        live = {sentence.mask for sentence in ai.knowledge}
+        for mask_1, mask_2 in ai._pairs_seen:
+            self.assertIn(mask_1, live)
+            self.assertIn(mask_2, live)
+
+    def test_subset_inference_adds_the_difference_sentence(self):
+        ai = MinesweeperAI(3, 3)
+        ai.add_knowledge((0, 1), 2)
+        ai.add_knowledge((0, 0), 1)
+        self.assertIn(Sentence({(1, 0), (1, 1)}, 1, 3), ai.knowledge)
+        self.assertIn(Sentence({(0, 2), (1, 2)}, 1, 3), ai.knowledge)
+
+    def test_subset_inference_resolves_safe_cells(self):
+        ai = MinesweeperAI(3, 3)
+        ai.add_knowledge((0, 1), 1)
+        ai.add_knowledge((0, 0), 1)
+        self.assertLessEqual({(0, 2), (1, 2)}, ai.safes)
+        self.assertEqual(ai.knowledge, [Sentence({(1, 0), (1, 1)}, 1, 3)])
+
+    def test_check_propagates_mines_into_other_sentences(self):
+        ai = MinesweeperAI(8, 8)
+        ai.add_sentence(Sentence({(0, 0), (0, 1), (0, 2)}, 1, 8))
+        changed = ai.check(Sentence({(0, 0)}, 1))
+        self.assertEqual(ai.mines, {(0, 0)})
+        self.assertEqual(changed, [Sentence({(0, 1), (0, 2)}, 0)])
+
+    def test_resolved_sentence_propagates_safes(self):
+        ai = MinesweeperAI(8, 8)
+        ai.add_knowledge((1, 1), 1)
+        ai.add_knowledge((0, 0), 0)
+        self.assertLessEqual({(0, 1), (1, 0)}, ai.safes)
+        self.assertEqual(ai.knowledge, [
+            Sentence({(0, 2), (1, 2), (2, 0), (2, 1), (2, 2)}, 1)
+        ])
+
+    def test_random_move_covers_every_free_cell(self):
+        ai = MinesweeperAI(3, 4)
+        ai.add_knowledge((0, 0), 1)
+        ai.mark_mine((2, 3))
+        random.seed(0)
+        moves = {ai.make_random_move() for i in range(500)}
+        expected = {(i, j) for i in range(3) for j in range(4)}
+        self.assertEqual(moves, expected - {(0, 0), (2, 3)})
+
+    def test_inferences_are_sound_across_seeded_games(self):
+        for seed in range(50):
+            random.seed(seed)
+            game = Minesweeper(8, 8, 8)
+            ai = MinesweeperAI(8, 8)
+            while True:
+                move = ai.make_safe_move()
+                if move is not None:
+                    self.assertFalse(game.is_mine(move))
+                else:
+                    move = ai.make_random_move()
+                    if move is None or game.is_mine(move):
+                        break
+                ai.add_knowledge(move, game.nearby_mines(move))
+                self.assertLessEqual(ai.mines, game.mines)
+                self.assertFalse(ai.safes & game.mines)
+
+
+if __name__ == "__main__":
+    unittest.main()